@@ -1,8 +1,13 @@
 from math import radians, cos, sin, asin, sqrt
+from typing import Union
+
+import numpy as np
+
+EARTH_RADIUS = 6371000  # Radius of earth in meters. Use 3956 for miles
 
 
 # from https://stackoverflow.com/a/4913653/1480643
-def haversine(lon1, lat1, lon2, lat2):
+def haversine_scalar(lon1: float, lat1: float, lon2: float, lat2: float) -> float:
     """
     Calculate the great circle distance between two points
     on the earth (specified in decimal degrees)
@@ -15,5 +20,31 @@ def haversine(lon1, lat1, lon2, lat2):
     dlat = lat2 - lat1
     a = sin(dlat / 2) ** 2 + cos(lat1) * cos(lat2) * sin(dlon / 2) ** 2
     c = 2 * asin(sqrt(a))
-    r = 6371000  # Radius of earth in meters. Use 3956 for miles
-    return c * r
+    return c * EARTH_RADIUS
+
+
+def haversine_array(lon1, lat1, lon2, lat2) -> Union[float, np.ndarray]:
+    """
+    Calculate the great circle distance between arrays of points
+    on the earth (specified in decimal degrees)
+    """
+    lon1, lat1, lon2, lat2 = map(np.radians, [lon1, lat1, lon2, lat2])
+
+    dlon = lon2 - lon1
+    dlat = lat2 - lat1
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlon / 2) ** 2
+    c = 2 * np.arcsin(np.sqrt(a))
+    return c * EARTH_RADIUS
+
+
+def haversine(lon1, lat1, lon2, lat2):
+    """
+    Calculate the great circle distance between two points (or arrays of points)
+    on the earth (specified in decimal degrees)
+
+    Plain numbers go through the pure-Python implementation, which is considerably
+    faster than NumPy for a single pair of points
+    """
+    if all(isinstance(x, (int, float)) for x in (lon1, lat1, lon2, lat2)):
+        return haversine_scalar(lon1, lat1, lon2, lat2)
+    return haversine_array(lon1, lat1, lon2, lat2)
@@ -8,13 +8,12 @@ import numpy as np
 import pandas as pd
 import shapely.wkb
 from shapely.geometry import Polygon
-from shapely.ops import unary_union
 
 from aequilibrae import logger
 from aequilibrae.parameters import Parameters
 from aequilibrae.project.database_connection import database_connection
 from aequilibrae.project.network import OSMDownloader
-from aequilibrae.project.network.haversine import haversine
+from aequilibrae.project.network.haversine import haversine_scalar
 from aequilibrae.project.network.link_types import LinkTypes
 from aequilibrae.project.network.links import Links
 from aequilibrae.project.network.modes import Modes
@@ -29,6 +28,10 @@ pyqt = spec is not None
 if pyqt:
     from PyQt5.QtCore import pyqtSignal as SIGNAL
 
+# Declared types containing any of these are explicitly numeric (integer, real or numeric affinity) in SQLite.
+# Types such as BOOLEAN or DATE also get numeric affinity, but are not taken as skimmable
+NUMERIC_TYPE_MARKERS = ("INT", "REAL", "FLOA", "DOUB", "NUM", "DEC")
+
 
 class Network(WorkerThread):
     """
@@ -66,40 +69,16 @@ class Network(WorkerThread):
         field_names = curr.fetchall()
         ignore_fields = ["ogc_fid", "geometry"] + self.req_link_flds
 
-        skimmable = [
-            "INT",
-            "INTEGER",
-            "TINYINT",
-            "SMALLINT",
-            "MEDIUMINT",
-            "BIGINT",
-            "UNSIGNED BIG INT",
-            "INT2",
-            "INT8",
-            "REAL",
-            "DOUBLE",
-            "DOUBLE PRECISION",
-            "FLOAT",
-            "DECIMAL",
-            "NUMERIC",
-        ]
-        all_fields = []
-
-        for f in field_names:
-            if f[1] in ignore_fields:
-                continue
-            for i in skimmable:
-                if i in f[2].upper():
-                    all_fields.append(f[1])
-                    break
-
+        all_fields = [f[1] for f in field_names if f[1] not in ignore_fields and self.__is_numeric_type(f[2])]
         all_fields.append("distance")
+        fields_set = set(all_fields)
+
         real_fields = []
         for f in all_fields:
-            if f[-2:] == "ab":
-                if f[:-2] + "ba" in all_fields:
+            if f.endswith("_ab"):
+                if f[:-3] + "_ba" in fields_set:
                     real_fields.append(f[:-3])
-            elif f[-3:] != "_ba":
+            elif not f.endswith("_ba"):
                 real_fields.append(f)
 
         return real_fields
@@ -199,8 +178,9 @@ class Network(WorkerThread):
                     logger.info(i)
 
         # Need to compute the size of the bounding box to not exceed it too much
-        height = haversine((east + west) / 2, south, (east + west) / 2, north)
-        width = haversine(east, (north + south) / 2, west, (north + south) / 2)
+        mid_lon, mid_lat = (east + west) / 2, (north + south) / 2
+        height = haversine_scalar(mid_lon, south, mid_lon, north)
+        width = haversine_scalar(east, mid_lat, west, mid_lat)
         area = height * width
 
         par = Parameters().parameters["osm"]
@@ -209,20 +189,18 @@ class Network(WorkerThread):
         if area < max_query_area_size:
             polygons = [bbox]
         else:
-            polygons = []
             parts = math.ceil(area / max_query_area_size)
             horizontal = math.ceil(math.sqrt(parts))
             vertical = math.ceil(parts / horizontal)
             dx = (east - west) / horizontal
             dy = (north - south) / vertical
-            for i in range(horizontal):
-                xmin = max(-180, west + i * dx)
-                xmax = min(180, west + (i + 1) * dx)
-                for j in range(vertical):
-                    ymin = max(-90, south + j * dy)
-                    ymax = min(90, south + (j + 1) * dy)
-                    box = [xmin, ymin, xmax, ymax]
-                    polygons.append(box)
+            xs = np.clip(west + np.arange(horizontal + 1) * dx, -180, 180)
+            ys = np.clip(south + np.arange(vertical + 1) * dy, -90, 90)
+
+            # One box per (column, row) pair, with rows varying fastest
+            xmin, ymin = np.meshgrid(xs[:-1], ys[:-1], indexing="ij")
+            xmax, ymax = np.meshgrid(xs[1:], ys[1:], indexing="ij")
+            polygons = np.stack([xmin, ymin, xmax, ymax], axis=-1).reshape(-1, 4).tolist()
         logger.info("Downloading data")
         self.downloader = OSMDownloader(polygons, modes)
         if pyqt:
@@ -270,8 +248,15 @@ class Network(WorkerThread):
             curr.execute("PRAGMA table_info(links);")
             field_names = curr.fetchall()
 
+            # Text, blob and geometry fields cannot be used in a graph, so we do not even read them.
+            # Any other field may hold numbers, so it is read and filtered by its contents below
+            required_fields = ["link_id", "a_node", "b_node", "direction", "modes"]
             ignore_fields = ["ogc_fid", "geometry"]
-            all_fields = [f[1] for f in field_names if f[1] not in ignore_fields]
+            all_fields = [
+                f[1]
+                for f in field_names
+                if f[1] in required_fields or (f[1] not in ignore_fields and not self.__is_text_or_blob_type(f[2]))
+            ]
         else:
             fields.extend(["link_id", "a_node", "b_node", "direction", "modes"])
             all_fields = list(set(fields))
@@ -290,9 +275,14 @@ class Network(WorkerThread):
         centroids = np.array([i[0] for i in curr.fetchall()], np.uint32)
 
         data = df[valid_fields]
+        mode_masks = {m: data.modes.str.contains(m, regex=False).values for m in modes}
+
+        # Only b_node changes between modes, so with copy-on-write the graphs can share all other columns.
+        # Without it, each graph needs its own copy so editing one graph's network does not change the others
+        deep_copy = not self.__copy_on_write()
         for m in modes:
-            net = pd.DataFrame(data, copy=True)
-            net.loc[~net.modes.str.contains(m), "b_node"] = net.loc[~net.modes.str.contains(m), "a_node"]
+            net = data.copy(deep=deep_copy)
+            net["b_node"] = np.where(mode_masks[m], data.b_node.values, data.a_node.values)
             g = Graph()
             g.mode = m
             g.network = net
@@ -359,14 +349,36 @@ class Network(WorkerThread):
             *model coverage* (:obj:`Polygon`): Shapely (Multi)polygon of the model network.
         """
         curr = self.conn.cursor()
-        curr.execute('Select ST_asBinary("geometry") from Links where ST_Length("geometry") > 0;')
-        links = [shapely.wkb.loads(x[0]) for x in curr.fetchall()]
-        return unary_union(links).convex_hull
+        curr.execute('Select ST_asBinary(ST_ConvexHull(ST_Collect("geometry"))) from Links where ST_Length("geometry") > 0;')
+        hull = curr.fetchone()[0]
+        if hull is None:  # No link with a positive length
+            return Polygon()
+        return shapely.wkb.loads(hull)
 
     def refresh_connection(self):
         """Opens a new database connection to avoid thread conflict"""
         self.conn = database_connection()
 
+    @staticmethod
+    def __copy_on_write() -> bool:
+        if int(pd.__version__.split(".")[0]) >= 3:
+            return True
+        try:
+            return pd.get_option("mode.copy_on_write") is True
+        except KeyError:  # pandas < 1.5 does not have copy-on-write at all
+            return False
+
+    @staticmethod
+    def __is_text_or_blob_type(field_type: str) -> bool:
+        # Follows SQLite's affinity rules, where INT takes precedence. Untyped fields are not excluded
+        field_type = field_type.upper()
+        return "INT" not in field_type and any(t in field_type for t in ("CHAR", "CLOB", "TEXT", "BLOB"))
+
+    @staticmethod
+    def __is_numeric_type(field_type: str) -> bool:
+        field_type = field_type.upper()
+        return any(t in field_type for t in NUMERIC_TYPE_MARKERS)
+
     def __count_items(self, field: str, table: str, condition: str) -> int:
         c = self.conn.execute(f"select count({field}) from {table} where {condition};").fetchone()[0]
         return c
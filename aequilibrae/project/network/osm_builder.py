@@ -5,7 +5,7 @@ from typing import List
 import importlib.util as iutil
 import numpy as np
 from aequilibrae.project.network.link_types import LinkTypes
-from .haversine import haversine
+from .haversine import haversine_scalar
 from aequilibrae import logger
 from aequilibrae.parameters import Parameters
 from ...utils import WorkerThread
@@ -34,8 +34,8 @@ class OSMBuilder(WorkerThread):
         self.node_start = node_start
         self.__link_types = None  # type: LinkTypes
         self.report = []
-        self.__model_link_types = []
-        self.__model_link_type_ids = []
+        self.__model_link_types = set()
+        self.__model_link_type_ids = set()
         self.__link_type_quick_reference = {}
         self.nodes = {}
         self.links = {}
@@ -126,74 +126,89 @@ class OSMBuilder(WorkerThread):
         mode_codes, not_found_tags = self.modes_per_link_type()
         owf, twf = self.field_osm_source()
 
-        for osm_id, link in self.links.items():
-            self.__emit_all(["Value", counter])
-            counter += 1
-            if counter % 1000 == 0:
-                logger.info(f'Inserting segments from {counter:,} out of {L:,} OSM link objects')
-            vars["osm_id"] = osm_id
-            vars['link_type'] = 'default'
-            linknodes = link["nodes"]
-            linktags = link["tags"]
-
-            indices = np.searchsorted(node_count[:, 0], linknodes)
-            nodedegree = node_count[indices, 1]
-
-            # Makes sure that beginning and end are end nodes for a link
-            nodedegree[0] = 2
-            nodedegree[-1] = 2
-
-            intersections = np.where(nodedegree > 1)[0]
-            segments = intersections.shape[0] - 1
-
-            # Attributes that are common to all individual links/segments
-            vars["direction"] = (linktags.get("oneway") == "yes") * 1
-
-            for k, v in owf.items():
-                vars[k] = linktags.get(v)
-
-            for k, v in twf.items():
-                val = linktags.get(v["osm_source"])
-                if vars["direction"] == 0:
-                    for d1, d2 in [("ab", "forward"), ("ba", "backward")]:
-                        vars[f"{k}_{d1}"] = self.__get_link_property(d2, val, linktags, v)
-                elif vars["direction"] == -1:
-                    vars[f"{k}_ba"] = linktags.get(f"{v['osm_source']}:{'backward'}", val)
-                elif vars["direction"] == 1:
-                    vars[f"{k}_ab"] = linktags.get(f"{v['osm_source']}:{'forward'}", val)
-
-            vars["modes"] = mode_codes.get(linktags.get("highway"), not_found_tags)
-
-            vars['link_type'] = self.__link_type_quick_reference.get(vars['link_type'].lower(),
-                                                                     self.__repair_link_type(vars['link_type']))
-
-            if len(vars["modes"]) > 0:
-                for i in range(segments):
-                    attributes = self.__build_link_data(vars, intersections, i, linknodes, node_ids, fields)
-                    sql = self.insert_qry.format(table, field_names, ','.join(['?'] * (len(attributes) - 1)))
-                    try:
-                        self.curr.execute(sql, attributes)
-                        self.curr.execute('Select a_node, b_node from links where link_id=?', [vars["link_id"]])
-                        a, b = self.curr.fetchone()
-                        self.curr.executemany('update nodes set osm_id=? where node_id=?',
-                                              [[linknodes[intersections[i]], a], [linknodes[intersections[i + 1]], b]])
-                    except Exception as e:
-                        data = list(vars.values())
-                        logger.error("error when inserting link {}. Error {}".format(data, e.args))
-                        logger.error(sql)
-                    vars["link_id"] += 1
-                self.conn.commit()
-            self.__emit_all(["text", f"{counter:,} of {L:,} super links added"])
-            self.links[osm_id] = []
-        self.conn.commit()
+        # All links go in a single transaction, so we relax syncing to disk and give SQLite more cache while importing
+        synchronous = self.curr.execute('PRAGMA synchronous').fetchone()[0]
+        cache_size = self.curr.execute('PRAGMA cache_size').fetchone()[0]
+        self.curr.execute('PRAGMA synchronous=NORMAL')
+        self.curr.execute('PRAGMA cache_size=-262144')
+
+        try:
+            for osm_id, link in self.links.items():
+                self.__emit_all(["Value", counter])
+                counter += 1
+                if counter % 1000 == 0:
+                    logger.info(f'Inserting segments from {counter:,} out of {L:,} OSM link objects')
+                vars["osm_id"] = osm_id
+                vars['link_type'] = 'default'
+                linknodes = link["nodes"]
+                linktags = link["tags"]
+
+                indices = np.searchsorted(node_count[:, 0], linknodes)
+                nodedegree = node_count[indices, 1]
+
+                # Makes sure that beginning and end are end nodes for a link
+                nodedegree[0] = 2
+                nodedegree[-1] = 2
+
+                intersections = np.where(nodedegree > 1)[0]
+                segments = intersections.shape[0] - 1
+
+                # Attributes that are common to all individual links/segments
+                vars["direction"] = (linktags.get("oneway") == "yes") * 1
+
+                for k, v in owf.items():
+                    vars[k] = linktags.get(v)
+
+                for k, v in twf.items():
+                    val = linktags.get(v["osm_source"])
+                    if vars["direction"] == 0:
+                        for d1, d2 in [("ab", "forward"), ("ba", "backward")]:
+                            vars[f"{k}_{d1}"] = self.__get_link_property(d2, val, linktags, v)
+                    elif vars["direction"] == -1:
+                        vars[f"{k}_ba"] = linktags.get(f"{v['osm_source']}:{'backward'}", val)
+                    elif vars["direction"] == 1:
+                        vars[f"{k}_ab"] = linktags.get(f"{v['osm_source']}:{'forward'}", val)
+
+                vars["modes"] = mode_codes.get(linktags.get("highway"), not_found_tags)
+
+                lt_key = vars['link_type'].lower()
+                if lt_key in self.__link_type_quick_reference:
+                    vars['link_type'] = self.__link_type_quick_reference[lt_key]
+                else:
+                    # Link types are saved through their own connection, so we cannot hold the write lock
+                    self.conn.commit()
+                    vars['link_type'] = self.__repair_link_type(vars['link_type'])
+
+                if len(vars["modes"]) > 0:
+                    for i in range(segments):
+                        attributes = self.__build_link_data(vars, intersections, i, linknodes, node_ids, fields)
+                        sql = self.insert_qry.format(table, field_names, ','.join(['?'] * (len(attributes) - 1)))
+                        try:
+                            self.curr.execute(sql, attributes)
+                            self.curr.execute('Select a_node, b_node from links where link_id=?', [vars["link_id"]])
+                            a, b = self.curr.fetchone()
+                            osm_nodes = [[linknodes[intersections[i]], a], [linknodes[intersections[i + 1]], b]]
+                            self.curr.executemany('update nodes set osm_id=? where node_id=?', osm_nodes)
+                        except Exception as e:
+                            data = list(vars.values())
+                            logger.error("error when inserting link {}. Error {}".format(data, e.args))
+                            logger.error(sql)
+                        vars["link_id"] += 1
+                self.__emit_all(["text", f"{counter:,} of {L:,} super links added"])
+                self.links[osm_id] = []
+        finally:
+            # The safety level cannot be changed inside a transaction
+            self.conn.commit()
+            self.curr.execute(f'PRAGMA synchronous={synchronous}')
+            self.curr.execute(f'PRAGMA cache_size={cache_size}')
         self.curr.close()
 
     def __worksetup(self):
         self.__link_types = LinkTypes(self)
         lts = self.__link_types.all_types()
         for lt_id, lt in lts.items():
-            self.__model_link_types.append(lt.link_type)
-            self.__model_link_type_ids.append(lt_id)
+            self.__model_link_types.add(lt.link_type)
+            self.__model_link_type_ids.add(lt_id)
 
     def __update_table_structure(self):
         curr = self.conn.cursor()
@@ -221,8 +236,8 @@ class OSMBuilder(WorkerThread):
             node_ids[linknodes[jj]] = vars["b_node"]
             self.node_start += 1
 
-        vars["distance"] = sum([haversine(self.nodes[x]["lon"], self.nodes[x]["lat"],
-                                          self.nodes[y]["lon"], self.nodes[y]["lat"])
+        vars["distance"] = sum([haversine_scalar(self.nodes[x]["lon"], self.nodes[x]["lat"],
+                                                 self.nodes[y]["lon"], self.nodes[y]["lat"])
                                 for x, y in zip(all_nodes[1:], all_nodes[:-1])])
 
         geometry = ["{} {}".format(self.nodes[x]["lon"], self.nodes[x]["lat"]) for x in all_nodes]
@@ -266,8 +281,8 @@ class OSMBuilder(WorkerThread):
         lt.link_type = link_type
         lt.description = f"Link types from Open Street Maps: {original_link_type}"
         lt.save()
-        self.__model_link_types.append(link_type)
-        self.__model_link_type_ids.append(letter)
+        self.__model_link_types.add(link_type)
+        self.__model_link_type_ids.add(letter)
         self.__link_type_quick_reference[original_link_type.lower()] = link_type
         return link_type
 
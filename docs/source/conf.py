@@ -13,18 +13,16 @@
 # documentation root, use os.path.abspath to make it absolute, like shown here.
 
 import os
+import re
+import runpy
 import sys
 
 import sphinx_theme
 
-try:
-    from aequilibrae.paths.__version__ import release_version
-except ImportError as e:
-    sys.path.insert(0, os.path.abspath("../.."))
-    from aequilibrae.paths.__version__ import release_version
-    import warnings
+sys.path.insert(0, os.path.abspath("../.."))
 
-    warnings.warn(f"It is really annoying to deal with Flake8 sometimes. {e.args}")
+# Reads the version without importing aequilibrae, so autodoc can still mock its dependencies
+release_version = runpy.run_path(os.path.abspath("../../aequilibrae/paths/__version__.py"))["release_version"]
 
 #
 
@@ -37,7 +35,7 @@ author = "Pedro Camargo"
 # The short X.Y version
 version = release_version
 # The full version, including alpha/beta/rc tags
-release = "30/07/2018"
+release = release_version
 
 # -- General configuration ---------------------------------------------------
 
@@ -64,8 +62,16 @@ extensions = [
 sphinx_gallery_conf = {
     'examples_dirs': ['examples'],  # path to your example scripts
     'gallery_dirs': ['_auto_examples'],  # path to where to save gallery generated output
+    'filename_pattern': re.escape(os.sep) + 'plot_',  # only these examples are executed
+    'capture_repr': (),
+    'thumbnail_size': (250, 175),
+    'image_srcset': ["2x"],
+    'only_warn_on_example_error': True,
 }
 
+# Notebooks are rendered with the outputs stored in them
+nbsphinx_execute = 'never'
+
 # Add any paths that contain templates here, relative to this directory.
 templates_path = ["_templates"]
 
@@ -90,6 +96,10 @@ language = None
 # This pattern also affects html_static_path and html_extra_path .
 exclude_patterns = ["_build", "Thumbs.db", ".DS_Store", '*.pyx']
 
+# The build runs in parallel (``-j auto`` in the Makefile), so all configuration values must be
+# picklable: no lambdas or functions in the option dictionaries in this file
+suppress_warnings = ["ref.python"]  # Ambiguous cross-references to classes re-exported by packages
+
 # The name of the Pygments (syntax highlighting) style to use.
 pygments_style = "sphinx"
 highlight_language = 'none'
@@ -136,22 +146,25 @@ man_pages = [(master_doc, "aequilibrae", "AequilibraE Documentation", [author],
 # -- Options for Texinfo output ----------------------------------------------
 
 autodoc_default_options = {
-    'members': 'var1, var2',
     'member-order': 'bysource',
     'special-members': '__init__',
-    'private-members': False,
     'undoc-members': True,
     'exclude-members': '__weakref__',
-    'inherited-members': False,
-    'show-inheritance': False,
-    'autodoc_inherit_docstrings': False
 }
 
+autodoc_inherit_docstrings = False
+
 autodoc_member_order = 'groupwise'
 
 autoclass_content = "class"  # classes should include both the class' and the __init__ method's docstring
 
 autosummary_generate = True
+autosummary_generate_overwrite = False  # Keeps the stub files from previous builds
+
+# Heavy (and compiled) dependencies are replaced by mocks when autodoc imports the modules it documents.
+# NumPy and SciPy cannot be mocked, as aequilibrae checks their versions when imported
+autodoc_mock_imports = ["pandas", "shapely", "aequilibrae.paths.AoN"]
+autosummary_mock_imports = autodoc_mock_imports
 
 # Grouping the document tree into Texinfo files. List of tuples
 # (source start file, target name, title, author,
@@ -167,3 +180,25 @@ texinfo_documents = [
         "Miscellaneous",
     )
 ]
+
+
+# -- Gallery thumbnails ------------------------------------------------------
+
+thumbnail_tag = re.compile(r'<img (?=[^>]*src="[^"]*sphx_glr_[^"]*_thumb\.)')
+
+
+def lazy_load_thumbnails(app, pagename, templatename, context, doctree):
+    """Lets the browser defer fetching gallery thumbnails that are not on screen"""
+    if "body" in context:
+        context["body"] = thumbnail_tag.sub('<img loading="lazy" decoding="async" ', context["body"])
+
+
+def setup(app):
+    app.connect("html-page-context", lazy_load_thumbnails)
+
+    # These extensions do not declare their metadata, and any one of them makes Sphinx read all sources serially.
+    # They only register directives and documenters that keep no state in the build environment
+    for extension in ["sphinx_git", "sphinx_autodoc_annotation"]:
+        if extension in app.extensions:
+            app.extensions[extension].parallel_read_safe = True
+            app.extensions[extension].parallel_write_safe = True
@@ -0,0 +1,29 @@
+from unittest import TestCase
+from unittest.mock import patch
+
+import numpy as np
+
+from aequilibrae.project.network import haversine as hav
+
+
+class TestHaversine(TestCase):
+    def test_scalar_implementations_agree(self):
+        expected = hav.haversine_scalar(-112.185, 36.59, -112.179, 36.60)
+        self.assertAlmostEqual(expected, hav.haversine_array(-112.185, 36.59, -112.179, 36.60), 6)
+        self.assertAlmostEqual(expected, hav.haversine(-112.185, 36.59, -112.179, 36.60), 6)
+
+    def test_arrays_use_vectorized_implementation(self):
+        lon1, lat1 = np.array([-112.185, 0.0]), np.array([36.59, 0.0])
+        lon2, lat2 = np.array([-112.179, 1.0]), np.array([36.60, 0.0])
+
+        with patch.object(hav, "haversine_array", wraps=hav.haversine_array) as vectorized:
+            dist = hav.haversine(lon1, lat1, lon2, lat2)
+            vectorized.assert_called_once()
+
+        self.assertEqual(dist.shape, (2,))
+        for i in range(2):
+            self.assertAlmostEqual(dist[i], hav.haversine_scalar(lon1[i], lat1[i], lon2[i], lat2[i]), 6)
+
+    def test_numpy_integer_scalars(self):
+        dist = hav.haversine(np.int64(0), np.int32(0), np.int64(1), np.int32(0))
+        self.assertAlmostEqual(dist, hav.haversine_scalar(0, 0, 1, 0), 6)
@@ -5,6 +5,7 @@ import os
 import uuid
 from shutil import copytree
 import platform
+from shapely.geometry import Polygon
 from aequilibrae.project import Project
 from aequilibrae.project.network.network import Network
 from aequilibrae.parameters import Parameters
@@ -82,3 +83,37 @@ class TestNetwork(TestCase):
     def test_count_nodes(self):
         items = self.siouxfalls.network.count_nodes()
         self.assertEqual(24, items, 'Wrong number of nodes found')
+
+    def test_numeric_field_types(self):
+        fields = self.siouxfalls.network.links.fields
+        fields.add("int4_field", "INT4 field", "INT4")
+        fields.add("float64_field", "FLOAT64 field", "FLOAT64")
+        fields.add("double_field", "DOUBLE PRECISION field", "DOUBLE PRECISION")
+        fields.add("untyped_field", "Field without a type", "")
+        fields.add("text_field", "TEXT field", "TEXT")
+
+        curr = self.siouxfalls.conn.cursor()
+        curr.execute("""update links set int4_field=1, float64_field=1.5, double_field=2.5, untyped_field=3,
+                                         text_field='some text'""")
+        self.siouxfalls.conn.commit()
+
+        skimmable = self.siouxfalls.network.skimmable_fields()
+        for field in ["int4_field", "float64_field", "double_field"]:
+            self.assertIn(field, skimmable, f"{field} should be skimmable")
+        for field in ["untyped_field", "text_field"]:
+            self.assertNotIn(field, skimmable, f"{field} should not be skimmable")
+
+        self.siouxfalls.network.build_graphs(modes=["c"])
+        columns = self.siouxfalls.network.graphs["c"].network.columns
+        for field in ["int4_field", "float64_field", "double_field", "untyped_field"]:
+            self.assertIn(field, columns, f"{field} missing from the graph")
+        self.assertNotIn("text_field", columns, "Text fields should not be in the graph")
+
+    def test_convex_hull_without_links(self):
+        curr = self.siouxfalls.conn.cursor()
+        curr.execute("delete from links")
+        self.siouxfalls.conn.commit()
+
+        hull = self.siouxfalls.network.convex_hull()
+        self.assertIsInstance(hull, Polygon, "Convex hull should be a polygon")
+        self.assertTrue(hull.is_empty, "Convex hull of a network without links should be empty")